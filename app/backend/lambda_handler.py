@@ -91,13 +91,19 @@ async def initialize_services_once():
             # MODULE_IMPORTS_START
             from services.database import initialize_database
             from services.mock_data import initialize_mock_data
-            from services.auth import initialize_admin_user
+            from services.auth import initialize_admin_user, purge_expired_oidc_states
             # MODULE_IMPORTS_END
 
             # MODULE_STARTUP_START
             await initialize_database()
             await initialize_mock_data()
             await initialize_admin_user()
+            # No long-lived cleanup task in Lambda; purge expired OIDC states once per cold start.
+            # Best effort: a failed purge must not abort initialization
+            try:
+                await purge_expired_oidc_states()
+            except Exception as e:
+                logger.warning(f"Failed to purge expired OIDC states: {e}")
             # MODULE_STARTUP_END
 
             services_initialized = True
@@ -1,8 +1,9 @@
+import asyncio
 import importlib
 import logging
 import os
 import pkgutil
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
 
 from core.config import settings
@@ -13,7 +14,9 @@ from fastapi.routing import APIRouter
 # MODULE_IMPORTS_START
 from services.database import initialize_database, close_database
 from services.mock_data import initialize_mock_data
-from services.auth import initialize_admin_user
+from services.auth import initialize_admin_user, run_oidc_state_cleanup
+from services.aihub import close_http_client as close_aihub_http_client
+from services.storage import close_http_client as close_storage_http_client
 # MODULE_IMPORTS_END
 
 
@@ -67,11 +70,17 @@ async def lifespan(app: FastAPI):
     await initialize_database()
     await initialize_mock_data()
     await initialize_admin_user()
+    oidc_cleanup_task = asyncio.create_task(run_oidc_state_cleanup())
     # MODULE_STARTUP_END
 
     logger.info("=== Application startup completed successfully ===")
     yield
     # MODULE_SHUTDOWN_START
+    oidc_cleanup_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await oidc_cleanup_task
+    await close_aihub_http_client()
+    await close_storage_http_client()
     await close_database()
     # MODULE_SHUTDOWN_END
 
@@ -172,7 +181,6 @@ def run_in_debug_mode(app: FastAPI):
     Args:
         app: The FastAPI application instance
     """
-    import asyncio
     from pathlib import Path
 
     import uvicorn
@@ -1,38 +1,57 @@
+import re
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional
 
 from dependencies.auth import get_admin_user
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from schemas.auth import UserResponse
 
 router = APIRouter(prefix="/api/v1/admin/settings", tags=["admin-settings"])
 
+_BACKEND_ENV = (Path(__file__).parent.parent / ".env").resolve()
+_FRONTEND_ENV = (Path(__file__).parent.parent.parent / "frontend" / ".env").resolve()
+_ENV_PATHS = {"backend": _BACKEND_ENV, "frontend": _FRONTEND_ENV}
+
+# One `KEY=VALUE` assignment per line (the key may be empty); blank lines and `#` comments never match.
+# `[^\S\n]` is any whitespace but the newline, so keys and values are trimmed exactly like str.strip()
+_ENV_RE = re.compile(r"^(?![^\S\n]*#)[^\S\n]*([^=\n]*?)[^\S\n]*=[^\S\n]*([^\n]*?)[^\S\n]*$", re.MULTILINE)
+
 
 class EnvVariable(BaseModel):
+    model_config = ConfigDict(frozen=True, validate_assignment=False)
+
     key: str
     value: str
     description: str = ""
 
 
 class EnvConfig(BaseModel):
+    model_config = ConfigDict(frozen=True, validate_assignment=False)
+
     backend_vars: Dict[str, EnvVariable]
     frontend_vars: Dict[str, EnvVariable]
 
 
+# Serializes the whole variable map to JSON bytes in one pydantic-core pass
+_ENV_MAP_ADAPTER = TypeAdapter(Dict[str, EnvVariable])
+
+
 class EnvVariableUpdate(BaseModel):
     value: str
 
 
+class BulkEnvUpdate(BaseModel):
+    updates: Dict[str, str] = {}
+    deletes: List[str] = []
+
+
 def get_env_file_path(env_type: str) -> Path:
     """Get the path to the environment variable file."""
-    base_path = Path(__file__).parent.parent
-    if env_type == "backend":
-        return base_path / ".env"
-    elif env_type == "frontend":
-        return base_path.parent / "frontend" / ".env"
-    else:
-        raise ValueError("Invalid env_type")
+    try:
+        return _ENV_PATHS[env_type]
+    except KeyError:
+        raise ValueError("Invalid env_type") from None
 
 
 def read_env_file(env_type: str) -> Dict[str, str]:
@@ -41,14 +60,11 @@ def read_env_file(env_type: str) -> Dict[str, str]:
     if not env_file.exists():
         return {}
 
-    env_vars = {}
-    with open(env_file, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith("#") and "=" in line:
-                key, value = line.split("=", 1)
-                env_vars[key.strip()] = value.strip()
-    return env_vars
+    # Scan the whole file in one pass instead of materializing a list of lines; a plain read (not
+    # mmap) so a concurrent rewrite of the file cannot fault the reader. Text mode translates
+    # \r\n and lone \r line endings to \n, as iterating the file line by line does
+    content = env_file.read_text(encoding="utf-8")
+    return {m.group(1): m.group(2) for m in _ENV_RE.finditer(content)}
 
 
 def write_env_file(env_type: str, env_vars: Dict[str, str]):
@@ -63,6 +79,18 @@ def write_env_file(env_type: str, env_vars: Dict[str, str]):
             f.write(f"{key}={value}\n")
 
 
+def apply_env_changes(
+    env_type: str, updates: Optional[Dict[str, str]] = None, deletes: Optional[List[str]] = None
+) -> List[str]:
+    """Apply updates and deletes in a single read-modify-write cycle; return the keys actually deleted."""
+    env_vars = read_env_file(env_type)
+    env_vars.update(updates or {})
+    deleted = [key for key in deletes or [] if env_vars.pop(key, None) is not None]
+    if updates or deleted:
+        write_env_file(env_type, env_vars)
+    return deleted
+
+
 @router.get("", response_model=EnvConfig)
 async def get_settings(current_user: UserResponse = Depends(get_admin_user)):
     """Retrieve environment variable configuration."""
@@ -93,16 +121,28 @@ async def get_settings(current_user: UserResponse = Depends(get_admin_user)):
 
         frontend_descriptions = {"VITE_API_BASE_URL": "Base API URL", "VITE_FRONTEND_URL": "Frontend URL"}
 
-        # Build response data
+        # Build response data; values come straight from the env files, so skip validation
         backend_config = {}
         for key, value in backend_vars.items():
-            backend_config[key] = EnvVariable(key=key, value=value, description=backend_descriptions.get(key, ""))
+            backend_config[key] = EnvVariable.model_construct(
+                key=key, value=value, description=backend_descriptions.get(key, "")
+            )
 
         frontend_config = {}
         for key, value in frontend_vars.items():
-            frontend_config[key] = EnvVariable(key=key, value=value, description=frontend_descriptions.get(key, ""))
-
-        return EnvConfig(backend_vars=backend_config, frontend_vars=frontend_config)
+            frontend_config[key] = EnvVariable.model_construct(
+                key=key, value=value, description=frontend_descriptions.get(key, "")
+            )
+
+        # Return the encoded body directly so FastAPI skips jsonable_encoder and response_model re-validation
+        body = (
+            b'{"backend_vars":'
+            + _ENV_MAP_ADAPTER.dump_json(backend_config)
+            + b',"frontend_vars":'
+            + _ENV_MAP_ADAPTER.dump_json(frontend_config)
+            + b"}"
+        )
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read configuration: {str(e)}")
 
@@ -113,9 +153,7 @@ async def update_backend_setting(
 ):
     """Update a backend environment variable."""
     try:
-        env_vars = read_env_file("backend")
-        env_vars[key] = update.value
-        write_env_file("backend", env_vars)
+        apply_env_changes("backend", updates={key: update.value})
         return {"message": f"Backend configuration '{key}' updated successfully; restart required to take effect."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update configuration: {str(e)}")
@@ -127,9 +165,7 @@ async def update_frontend_setting(
 ):
     """Update a frontend environment variable."""
     try:
-        env_vars = read_env_file("frontend")
-        env_vars[key] = update.value
-        write_env_file("frontend", env_vars)
+        apply_env_changes("frontend", updates={key: update.value})
         return {"message": f"Frontend configuration '{key}' updated successfully; restart required to take effect."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update configuration: {str(e)}")
@@ -141,9 +177,7 @@ async def add_backend_setting(
 ):
     """Add a backend environment variable."""
     try:
-        env_vars = read_env_file("backend")
-        env_vars[key] = update.value
-        write_env_file("backend", env_vars)
+        apply_env_changes("backend", updates={key: update.value})
         return {"message": f"Backend configuration '{key}' added successfully; restart required to take effect."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to add configuration: {str(e)}")
@@ -155,9 +189,7 @@ async def add_frontend_setting(
 ):
     """Add a frontend environment variable."""
     try:
-        env_vars = read_env_file("frontend")
-        env_vars[key] = update.value
-        write_env_file("frontend", env_vars)
+        apply_env_changes("frontend", updates={key: update.value})
         return {"message": f"Frontend configuration '{key}' added successfully; restart required to take effect."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to add configuration: {str(e)}")
@@ -167,10 +199,7 @@ async def add_frontend_setting(
 async def delete_backend_setting(key: str, current_user: UserResponse = Depends(get_admin_user)):
     """Delete a backend environment variable."""
     try:
-        env_vars = read_env_file("backend")
-        if key in env_vars:
-            del env_vars[key]
-            write_env_file("backend", env_vars)
+        if apply_env_changes("backend", deletes=[key]):
             return {"message": f"Backend configuration '{key}' deleted successfully; restart required to take effect."}
         else:
             raise HTTPException(status_code=404, detail=f"Configuration item '{key}' does not exist")
@@ -182,12 +211,35 @@ async def delete_backend_setting(key: str, current_user: UserResponse = Depends(
 async def delete_frontend_setting(key: str, current_user: UserResponse = Depends(get_admin_user)):
     """Delete a frontend environment variable."""
     try:
-        env_vars = read_env_file("frontend")
-        if key in env_vars:
-            del env_vars[key]
-            write_env_file("frontend", env_vars)
+        if apply_env_changes("frontend", deletes=[key]):
             return {"message": f"Frontend configuration '{key}' deleted successfully; restart required to take effect."}
         else:
             raise HTTPException(status_code=404, detail=f"Configuration item '{key}' does not exist")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete configuration: {str(e)}")
+
+
+@router.patch("/backend")
+async def bulk_update_backend_settings(update: BulkEnvUpdate, current_user: UserResponse = Depends(get_admin_user)):
+    """Add, update and delete backend environment variables in one request."""
+    try:
+        deleted = apply_env_changes("backend", updates=update.updates, deletes=update.deletes)
+        return {
+            "message": f"Backend configuration updated successfully ({len(update.updates)} set, "
+            f"{len(deleted)} deleted); restart required to take effect."
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update configuration: {str(e)}")
+
+
+@router.patch("/frontend")
+async def bulk_update_frontend_settings(update: BulkEnvUpdate, current_user: UserResponse = Depends(get_admin_user)):
+    """Add, update and delete frontend environment variables in one request."""
+    try:
+        deleted = apply_env_changes("frontend", updates=update.updates, deletes=update.deletes)
+        return {
+            "message": f"Frontend configuration updated successfully ({len(update.updates)} set, "
+            f"{len(deleted)} deleted); restart required to take effect."
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update configuration: {str(e)}")
@@ -1,12 +1,14 @@
 import logging
 
 from dependencies.auth import get_admin_user, get_current_user
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import BaseModel
 from schemas.auth import UserResponse
 from schemas.storage import (
     BucketListResponse,
     BucketRequest,
     BucketResponse,
+    BulkObjectRequest,
     DeleteResponse,
     FileUpDownRequest,
     FileUpDownResponse,
@@ -24,6 +26,11 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/storage", tags=["storage"])
 
 
+def _dump(obj: BaseModel) -> Response:
+    """Serialize an already-validated service result once, bypassing response_model re-validation."""
+    return Response(content=obj.model_dump_json(), media_type="application/json")
+
+
 @router.post("/create-bucket", response_model=BucketResponse)
 async def create_bucket(request: BucketRequest, _current_user: UserResponse = Depends(get_admin_user)):
     """
@@ -31,7 +38,7 @@ async def create_bucket(request: BucketRequest, _current_user: UserResponse = De
     """
     try:
         service = StorageService()
-        return await service.create_bucket(request)
+        return _dump(await service.create_bucket(request))
     except ValueError as e:
         logger.error(f"Invalid create bucket request: {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -47,7 +54,7 @@ async def list_buckets(_current_user: UserResponse = Depends(get_current_user)):
     """
     try:
         service = StorageService()
-        return await service.list_buckets()
+        return _dump(await service.list_buckets())
     except ValueError as e:
         logger.error(f"Invalid list buckets request: {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -63,7 +70,7 @@ async def list_objects(request: OSSBaseModel = Depends(), _current_user: UserRes
     """
     try:
         service = StorageService()
-        return await service.list_objects(request)
+        return _dump(await service.list_objects(request))
     except ValueError as e:
         logger.error(f"Invalid list objects request: {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -79,7 +86,7 @@ async def get_object_info(request: ObjectRequest = Depends(), _current_user: Use
     """
     try:
         service = StorageService()
-        return await service.get_object_info(request)
+        return _dump(await service.get_object_info(request))
     except ValueError as e:
         logger.error(f"Invalid get object metadata request: {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -95,7 +102,7 @@ async def rename_object(request: RenameRequest, _current_user: UserResponse = De
     """
     try:
         service = StorageService()
-        return await service.rename_object(request)
+        return _dump(await service.rename_object(request))
     except ValueError as e:
         logger.error(f"Invalid rename object: {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -111,7 +118,7 @@ async def delete_object(request: ObjectRequest, _current_user: UserResponse = De
     """
     try:
         service = StorageService()
-        return await service.delete_object(request)
+        return _dump(await service.delete_object(request))
     except ValueError as e:
         logger.error(f"Invalid delete object: {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -120,6 +127,22 @@ async def delete_object(request: ObjectRequest, _current_user: UserResponse = De
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{e}")
 
 
+@router.delete("/delete-objects", response_model=DeleteResponse)
+async def delete_objects(request: BulkObjectRequest, _current_user: UserResponse = Depends(get_current_user)):
+    """
+    Delete several objects inside the bucket in one call
+    """
+    try:
+        service = StorageService()
+        return _dump(await service.delete_objects(request))
+    except ValueError as e:
+        logger.error(f"Invalid delete objects: {e}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to delete objects: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{e}")
+
+
 @router.post("/upload-url", response_model=FileUpDownResponse)
 async def upload_file(request: FileUpDownRequest, _current_user: UserResponse = Depends(get_current_user)):
     """
@@ -134,7 +157,7 @@ async def upload_file(request: FileUpDownRequest, _current_user: UserResponse =
     """
     try:
         service = StorageService()
-        return await service.create_upload_url(request)
+        return _dump(await service.create_upload_url(request))
     except ValueError as e:
         logger.error(f"Invalid upload request: {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -150,7 +173,7 @@ async def download_file(request: FileUpDownRequest, _current_user: UserResponse
     """
     try:
         service = StorageService()
-        return await service.create_download_url(request)
+        return _dump(await service.create_download_url(request))
     except ValueError as e:
         logger.error(f"Invalid download request: {e}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -2,7 +2,7 @@
 Request and response models for the AI Hub module.
 """
 
-from typing import List, Literal, Optional, Union
+from typing import Annotated, List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -18,17 +18,21 @@ class ImageUrl(BaseModel):
 class ContentPartText(BaseModel):
     """Text content part."""
 
-    type: str = Field(default="text", description="Content type.")
+    type: Literal["text"] = Field(default="text", description="Content type.")
     text: str = Field(..., description="Text content.")
 
 
 class ContentPartImage(BaseModel):
     """Image content part."""
 
-    type: str = Field(default="image_url", description="Content type.")
+    type: Literal["image_url"] = Field(default="image_url", description="Content type.")
     image_url: ImageUrl = Field(..., description="Image URL configuration.")
 
 
+# Dispatch list items on the `type` tag instead of trying each union member in turn
+ContentPart = Annotated[Union[ContentPartText, ContentPartImage], Field(discriminator="type")]
+
+
 class ChatMessage(BaseModel):
     """
     Chat message format.
@@ -39,7 +43,7 @@ class ChatMessage(BaseModel):
     """
 
     role: str = Field(..., description="Message role: system/user/assistant.")
-    content: Union[str, List[Union[ContentPartText, ContentPartImage]]] = Field(
+    content: Union[str, List[ContentPart]] = Field(
         ..., description="Message content: a string or a list of content parts (multimodal)."
     )
 
@@ -67,12 +71,18 @@ class GenTxtResponse(BaseModel):
 
 # ==================== Generate Image ====================
 
+MAX_PROMPT_LENGTH = 8000
+MAX_IMAGE_DATA_URI_LENGTH = 20_000_000
+
+# Base64 data URI capped in the validator, so oversized payloads are rejected up front
+ImageDataUri = Annotated[str, Field(max_length=MAX_IMAGE_DATA_URI_LENGTH)]
+
 
 class GenImgRequest(BaseModel):
     """Generate Image request parameters."""
 
-    prompt: str = Field(..., description="Prompt for image generation.")
-    image: Optional[Union[str, List[str]]] = Field(
+    prompt: str = Field(..., max_length=MAX_PROMPT_LENGTH, description="Prompt for image generation.")
+    image: Optional[Union[ImageDataUri, List[ImageDataUri]]] = Field(
         default=None,
         description=(
             "Optional input image(s) for editing (base64 data URI). "
@@ -89,7 +99,7 @@ class GenImgRequest(BaseModel):
         default="standard",
         description="Image quality (only for text-to-image; ignored when `image` is provided).",
     )
-    n: int = Field(default=1, description="Number of images to generate (1-4).")
+    n: int = Field(default=1, ge=1, le=4, description="Number of images to generate (1-4).")
 
 
 class GenImgResponse(BaseModel):
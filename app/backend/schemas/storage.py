@@ -2,7 +2,10 @@ import os
 import re
 from typing import Literal
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+_BUCKET_NAME_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789-")
+_BUCKET_INVALID = re.compile(r"[^a-z0-9]")
 
 
 class OSSBaseModel(BaseModel):
@@ -13,7 +16,10 @@ class OSSBaseModel(BaseModel):
     def validate_bucket_name(cls, v):
         if not v or len(v.strip()) == 0:
             raise ValueError("bucket_name cannot be empty")
-        valid_bucket_name = re.sub(r"[^a-z0-9]", "-", v)
+        # Already-canonical names (the common case) skip the regex substitution
+        if 3 <= len(v) <= 63 and _BUCKET_NAME_CHARS.issuperset(v):
+            return v
+        valid_bucket_name = _BUCKET_INVALID.sub("-", v)
         if len(valid_bucket_name) < 3 or len(valid_bucket_name) > 63:
             raise ValueError("bucket_name length should between 3 and 63")
         return valid_bucket_name
@@ -32,6 +38,8 @@ class BucketResponse(BucketRequest):
 
 
 class ObjectInfo(OSSBaseModel):
+    model_config = ConfigDict(frozen=True, validate_assignment=False)
+
     object_key: str = ""
     size: int = 0
     last_modified: str = ""
@@ -43,7 +51,7 @@ class ObjectListResponse(BaseModel):
 
 
 class BucketInfo(BucketRequest):
-    pass
+    model_config = ConfigDict(frozen=True, validate_assignment=False)
 
 
 class BucketListResponse(BaseModel):
@@ -54,6 +62,12 @@ class ObjectRequest(OSSBaseModel):
     object_key: str = ""
 
 
+class BulkObjectRequest(OSSBaseModel):
+    """Request addressing several objects of one bucket in a single call."""
+
+    object_keys: list[str] = Field(..., min_length=1, description="Keys of the objects")
+
+
 class FileUpDownRequest(OSSBaseModel):
     """Request for generating presigned upload URL."""
 
@@ -3,8 +3,9 @@ AI Hub service layer implementation.
 Provides Generate Text (gentxt) and Generate Image (genimg) capabilities using the OpenAI SDK.
 """
 
+import asyncio
 import base64
-import io
+import binascii
 import logging
 from typing import AsyncGenerator
 
@@ -13,8 +14,88 @@ from core.config import settings
 from openai import AsyncOpenAI
 from schemas.aihub import GenImgRequest, GenImgResponse, GenTxtRequest, GenTxtResponse
 
+try:
+    import pybase64
+except ImportError:  # pragma: no cover - optional SIMD accelerator, fall back to stdlib
+    pybase64 = None
+
 logger = logging.getLogger(__name__)
 
+# Multiple of 3 so each downloaded chunk base64-encodes without padding
+DOWNLOAD_CHUNK_SIZE = 57 * 1024
+
+# Upper bound on concurrent image downloads per genimg call
+MAX_CONCURRENT_DOWNLOADS = 8
+
+# Streamed tokens are coalesced and flushed once the batch reaches this many characters...
+STREAM_FLUSH_CHARS = 64
+
+# ...or once this many seconds have passed since the previous flush
+STREAM_FLUSH_INTERVAL = 0.015
+
+# Shared across requests so image downloads reuse pooled HTTP/2 connections
+_http_client: httpx.AsyncClient | None = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide client used for image downloads, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared image download client (called on application shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _b64encode(data: bytes | memoryview) -> str:
+    """Base64-encode bytes to an ASCII string, using pybase64 when available."""
+    if pybase64 is not None:
+        return pybase64.b64encode_as_string(data)
+    return base64.b64encode(data).decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    """Decode a base64 string, using pybase64 when available."""
+    if pybase64 is not None:
+        # pybase64 decodes well-formed input fastest with validate=True; payloads with
+        # line breaks or other stray characters are retried on the lenient path
+        try:
+            return pybase64.b64decode(data, validate=True)
+        except binascii.Error:
+            return pybase64.b64decode(data, validate=False)
+    return base64.b64decode(data)
+
+
+# Content types for the data URI headers clients send in practice, resolved without parsing
+_CONTENT_TYPE_BY_HEADER = {
+    f"data:{content_type};base64": content_type
+    for content_type in ("image/png", "image/jpeg", "image/jpg", "image/webp", "image/gif")
+}
+
+# Prefixes of the overwhelmingly common inputs, matched before any header parsing
+_PNG_DATA_URI_PREFIX = "data:image/png;base64,"
+_JPEG_DATA_URI_PREFIX = "data:image/jpeg;base64,"
+
+_EXTENSION_BY_CONTENT_TYPE = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/webp": "webp",
+}
+
+# (filename, content, content_type) tuple accepted by the OpenAI SDK for multipart uploads
+ImageUpload = tuple[str, bytes, str]
+
 
 class InvalidImageInputError(ValueError):
     """Raised when the provided image input cannot be parsed."""
@@ -31,14 +112,12 @@ class AIHubService:
             api_key=settings.app_ai_key,
             base_url=settings.app_ai_base_url.rstrip("/"),
         )
+        self._http = _get_http_client()
 
-    def _convert_message(self, msg) -> dict:
-        """Convert message format and support multimodal content."""
-        content = msg.content
-        # If content is a list (multimodal), convert it to plain dicts
-        if isinstance(content, list):
-            content = [item.model_dump() if hasattr(item, "model_dump") else item for item in content]
-        return {"role": msg.role, "content": content}
+    @staticmethod
+    def _dump_messages(request: GenTxtRequest) -> list[dict]:
+        """Convert all messages (including multimodal content parts) to plain dicts in one pydantic-core pass."""
+        return request.model_dump(include={"messages"}, exclude_none=True)["messages"]
 
     async def gentxt(self, request: GenTxtRequest) -> GenTxtResponse:
         """
@@ -51,7 +130,7 @@ class AIHubService:
             Txt2TxtResponse: generated text response.
         """
         try:
-            messages = [self._convert_message(msg) for msg in request.messages]
+            messages = self._dump_messages(request)
 
             response = await self.client.chat.completions.create(
                 model=request.model,
@@ -91,7 +170,7 @@ class AIHubService:
             str: Generated text content chunk (plain text, not JSON).
         """
         try:
-            messages = [self._convert_message(msg) for msg in request.messages]
+            messages = self._dump_messages(request)
 
             stream = await self.client.chat.completions.create(
                 model=request.model,
@@ -101,9 +180,51 @@ class AIHubService:
                 stream=True,
             )
 
-            async for chunk in stream:
-                if chunk.choices and chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+            # Coalesce tokens so each SSE event carries a batch instead of a single token
+            loop = asyncio.get_running_loop()
+            chunks = stream.__aiter__()
+            buffer: list[str] = []
+            buffered = 0
+            last_flush = loop.time()
+            # The next chunk is read as a task so waiting on it can time out without cancelling the read
+            pending: asyncio.Future | None = None
+            try:
+                while True:
+                    if pending is None:
+                        pending = asyncio.ensure_future(chunks.__anext__())
+                    if buffer:
+                        # Don't hold buffered tokens while the model pauses: flush once the interval runs out
+                        remaining = max(0.0, last_flush + STREAM_FLUSH_INTERVAL - loop.time())
+                        done, _ = await asyncio.wait({pending}, timeout=remaining)
+                        if not done:
+                            yield "".join(buffer)
+                            buffer.clear()
+                            buffered = 0
+                            last_flush = loop.time()
+                            continue
+                    try:
+                        chunk = await pending
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        pending = None
+
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        content = chunk.choices[0].delta.content
+                        buffer.append(content)
+                        buffered += len(content)
+                        now = loop.time()
+                        if buffered >= STREAM_FLUSH_CHARS or now - last_flush >= STREAM_FLUSH_INTERVAL:
+                            yield "".join(buffer)
+                            buffer.clear()
+                            buffered = 0
+                            last_flush = now
+            finally:
+                if pending is not None:
+                    pending.cancel()
+
+            if buffer:
+                yield "".join(buffer)
 
         except Exception as e:
             logger.error(f"gentxt_stream error: {e}")
@@ -112,8 +233,7 @@ class AIHubService:
     async def _url_to_base64(self, url: str) -> str:
         """Convert an image URL to a base64 data URI."""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url)
+            async with self._http.stream("GET", url) as response:
                 response.raise_for_status()
 
                 # Get content-type, default to png
@@ -121,8 +241,20 @@ class AIHubService:
                 if ";" in content_type:
                     content_type = content_type.split(";")[0].strip()
 
+                # Encode while downloading; only whole 3-byte groups are encoded until the last chunk
+                parts: list[str] = []
+                pending = b""
+                async for chunk in response.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if pending:
+                        chunk = pending + chunk
+                    aligned = len(chunk) - len(chunk) % 3
+                    parts.append(_b64encode(memoryview(chunk)[:aligned]))
+                    pending = chunk[aligned:]
+                if pending:
+                    parts.append(_b64encode(pending))
+
                 # Convert to base64 data URI
-                b64_data = base64.b64encode(response.content).decode("utf-8")
+                b64_data = "".join(parts)
                 return f"data:{content_type};base64,{b64_data}"
         except Exception as e:
             logger.warning(f"Failed to convert URL to base64: {e}, returning original URL")
@@ -131,44 +263,46 @@ class AIHubService:
     @staticmethod
     def _parse_data_uri(data_uri: str) -> tuple[bytes, str]:
         """Parse a base64 data URI and return (bytes, content_type)."""
-        if "," not in data_uri:
-            raise InvalidImageInputError("Invalid data URI: missing ',' separator.")
-
-        header, b64_data = data_uri.split(",", 1)
-        content_type = "image/png"
-        if header.startswith("data:"):
-            meta = header[5:]
-            # Typical header: "image/png;base64"
-            if ";" in meta:
-                maybe_type = meta.split(";", 1)[0].strip()
-                if maybe_type:
-                    content_type = maybe_type
-            elif meta.strip():
-                content_type = meta.strip()
+        if data_uri.startswith(_PNG_DATA_URI_PREFIX):
+            content_type, payload_start = "image/png", len(_PNG_DATA_URI_PREFIX)
+        elif data_uri.startswith(_JPEG_DATA_URI_PREFIX):
+            content_type, payload_start = "image/jpeg", len(_JPEG_DATA_URI_PREFIX)
+        else:
+            comma = data_uri.find(",")
+            if comma < 0:
+                raise InvalidImageInputError("Invalid data URI: missing ',' separator.")
+            payload_start = comma + 1
+
+            header = data_uri[:comma]
+            content_type = _CONTENT_TYPE_BY_HEADER.get(header)
+            if content_type is None:
+                content_type = "image/png"
+                if header.startswith("data:"):
+                    # Typical header: "data:image/png;base64"
+                    maybe_type = header[5:].partition(";")[0].strip()
+                    if maybe_type:
+                        content_type = maybe_type
 
         try:
-            return base64.b64decode(b64_data), content_type
+            return _b64decode(data_uri[payload_start:]), content_type
         except Exception as e:
             raise InvalidImageInputError("Invalid base64 data in data URI.") from e
 
     @staticmethod
     def _filename_from_content_type(content_type: str, name_prefix: str = "image") -> str:
         """Best-effort filename for in-memory uploads."""
-        ct = (content_type or "").lower()
-        ext = {
-            "image/png": "png",
-            "image/jpeg": "jpg",
-            "image/jpg": "jpg",
-            "image/webp": "webp",
-        }.get(ct, "png")
+        ext = _EXTENSION_BY_CONTENT_TYPE.get((content_type or "").lower(), "png")
         return f"{name_prefix}.{ext}"
 
-    async def _image_str_to_upload_file(self, image: str, name_prefix: str = "image") -> io.BytesIO:
+    def _image_str_to_upload_file(self, image: str, name_prefix: str = "image") -> ImageUpload:
         """
-        Convert image input (base64 data URI) into an in-memory file object for uploads.
+        Convert image input (base64 data URI) into an upload tuple for multipart requests.
 
         The OpenAI `images.edit` endpoint expects multipart file uploads; we keep the API JSON-only
-        by allowing clients to pass a base64 data URI, and converting it here.
+        by allowing clients to pass a base64 data URI, and converting it here. The decoded bytes are
+        handed to the SDK as-is, without wrapping them in a file object.
+
+        This is synchronous and CPU-bound (base64 decode); async callers run it in a worker thread.
         """
         image = (image or "").strip()
         if not image:
@@ -185,14 +319,13 @@ class AIHubService:
 
         image_bytes, content_type = self._parse_data_uri(image)
 
-        upload = io.BytesIO(image_bytes)
-        # openai SDK uses this name for multipart filename
-        upload.name = self._filename_from_content_type(content_type, name_prefix=name_prefix)  # type: ignore[attr-defined]
-        return upload
+        # openai SDK uses the first element as the multipart filename
+        filename = self._filename_from_content_type(content_type, name_prefix=name_prefix)
+        return filename, image_bytes, content_type
 
-    async def _image_input_to_upload_files(self, image_input: str | list[str]) -> list[io.BytesIO]:
+    async def _image_input_to_upload_files(self, image_input: str | list[str]) -> list[ImageUpload]:
         """
-        Convert image input (single data URI or list of data URIs) into uploadable file objects.
+        Convert image input (single data URI or list of data URIs) into upload tuples.
 
         Some OpenAI-compatible `images/edits` implementations support multiple input images.
         """
@@ -200,12 +333,17 @@ class AIHubService:
         if not images:
             raise InvalidImageInputError("Input image list is empty.")
 
-        upload_files: list[io.BytesIO] = []
-        for idx, img in enumerate(images):
-            if not isinstance(img, str):
-                raise InvalidImageInputError("Each image must be a base64 data URI string.")
-            upload_files.append(await self._image_str_to_upload_file(img, name_prefix=f"image_{idx + 1}"))
-        return upload_files
+        if not all(isinstance(img, str) for img in images):
+            raise InvalidImageInputError("Each image must be a base64 data URI string.")
+
+        # Decode in worker threads so multi-MB payloads neither block the event loop nor each other
+        upload_files = await asyncio.gather(
+            *(
+                asyncio.to_thread(self._image_str_to_upload_file, img, f"image_{idx + 1}")
+                for idx, img in enumerate(images)
+            )
+        )
+        return list(upload_files)
 
     async def genimg(self, request: GenImgRequest) -> GenImgResponse:
         """
@@ -241,15 +379,28 @@ class AIHubService:
             revised_prompt = response.data[0].revised_prompt if response.data else None
 
             # Convert all URLs to base64 data URIs
-            images = []
+            images: list[str | None] = []
+            url_items: list[tuple[int, str]] = []
             for item in response.data:
                 if item.b64_json:
                     # If the API returns base64 directly, use it as is
                     images.append(f"data:image/png;base64,{item.b64_json}")
                 elif item.url:
-                    # If it is a URL, download and convert it to base64
-                    base64_uri = await self._url_to_base64(item.url)
-                    images.append(base64_uri)
+                    # If it is a URL, download it below and fill the slot in place
+                    url_items.append((len(images), item.url))
+                    images.append(None)
+
+            if url_items:
+                semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+
+                async def download(url: str) -> str:
+                    async with semaphore:
+                        return await self._url_to_base64(url)
+
+                # Download concurrently so total latency is the slowest image, not the sum
+                base64_uris = await asyncio.gather(*(download(url) for _, url in url_items))
+                for (idx, _), base64_uri in zip(url_items, base64_uris):
+                    images[idx] = base64_uri
 
             return GenImgResponse(
                 images=images,
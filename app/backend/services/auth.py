@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import time
 from datetime import datetime, timedelta, timezone
@@ -12,6 +13,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
+OIDC_STATE_CLEANUP_INTERVAL = 300  # seconds
+
 
 class AuthService:
     def __init__(self, db: AsyncSession):
@@ -19,28 +22,29 @@ class AuthService:
 
     async def get_or_create_user(self, platform_sub: str, email: str, name: Optional[str] = None) -> User:
         """Get existing user or create new one."""
+        now = datetime.now(timezone.utc)
         start_time = time.time()
         logger.debug(f"[DB_OP] Starting get_or_create_user - platform_sub: {platform_sub}")
         # Try to find existing user
-        result = await self.db.execute(select(User).where(User.id == platform_sub))
-        user = result.scalar_one_or_none()
+        user = await self.db.get(User, platform_sub)
         logger.debug(f"[DB_OP] User lookup completed in {time.time() - start_time:.4f}s - found: {user is not None}")
 
         if user:
             # Update user info if needed
             user.email = email
             user.name = name
-            user.last_login = datetime.now(timezone.utc)
+            user.last_login = now
         else:
             # Create new user
-            user = User(id=platform_sub, email=email, name=name, last_login=datetime.now(timezone.utc))
+            # created_at is set client-side so the row needs no refresh after commit
+            user = User(id=platform_sub, email=email, name=name, created_at=now, last_login=now)
             self.db.add(user)
 
+        # Sessions use expire_on_commit=False, so every attribute stays loaded after commit
         start_time_commit = time.time()
-        logger.debug("[DB_OP] Starting user commit/refresh")
+        logger.debug("[DB_OP] Starting user commit")
         await self.db.commit()
-        await self.db.refresh(user)
-        logger.debug(f"[DB_OP] User commit/refresh completed in {time.time() - start_time_commit:.4f}s")
+        logger.debug(f"[DB_OP] User commit completed in {time.time() - start_time_commit:.4f}s")
         return user
 
     async def issue_app_token(
@@ -71,9 +75,7 @@ class AuthService:
 
     async def store_oidc_state(self, state: str, nonce: str, code_verifier: str):
         """Store OIDC state in database."""
-        # Clean up expired states first
-        await self.db.execute(delete(OIDCState).where(OIDCState.expires_at < datetime.now(timezone.utc)))
-
+        # Expired states are purged by the background cleanup task, not on the login path
         expires_at = datetime.now(timezone.utc) + timedelta(minutes=10)  # 10 minute expiry
 
         oidc_state = OIDCState(state=state, nonce=nonce, code_verifier=code_verifier, expires_at=expires_at)
@@ -83,11 +85,23 @@ class AuthService:
 
     async def get_and_delete_oidc_state(self, state: str) -> Optional[dict]:
         """Get and delete OIDC state from database."""
-        # Clean up expired states first
-        await self.db.execute(delete(OIDCState).where(OIDCState.expires_at < datetime.now(timezone.utc)))
+        now = datetime.now(timezone.utc)
+        # Expired states never match; the background cleanup task removes them later
+        is_valid = (OIDCState.state == state) & (OIDCState.expires_at >= now)
+
+        if self.db.get_bind().dialect.delete_returning:
+            # Fetch and consume the state in a single statement
+            result = await self.db.execute(
+                delete(OIDCState).where(is_valid).returning(OIDCState.nonce, OIDCState.code_verifier)
+            )
+            row = result.one_or_none()
+            await self.db.commit()
+            if row is None:
+                return None
+            return {"nonce": row.nonce, "code_verifier": row.code_verifier}
 
         # Find and validate state
-        result = await self.db.execute(select(OIDCState).where(OIDCState.state == state))
+        result = await self.db.execute(select(OIDCState).where(is_valid))
         oidc_state = result.scalar_one_or_none()
 
         if not oidc_state:
@@ -120,8 +134,7 @@ async def initialize_admin_user():
 
     async with db_manager.async_session_maker() as db:
         # Check if admin user already exists
-        result = await db.execute(select(User).where(User.id == admin_user_id))
-        user = result.scalar_one_or_none()
+        user = await db.get(User, admin_user_id)
 
         if user:
             # Update existing user to admin if not already
@@ -138,3 +151,26 @@ async def initialize_admin_user():
             db.add(admin_user)
             await db.commit()
             logger.debug(f"Created admin user: {admin_user_id} with email: {admin_user_email}")
+
+
+async def purge_expired_oidc_states() -> int:
+    """Delete expired OIDC states and return the number of rows removed."""
+    if not db_manager.async_session_maker:
+        return 0
+
+    async with db_manager.async_session_maker() as db:
+        result = await db.execute(delete(OIDCState).where(OIDCState.expires_at < datetime.now(timezone.utc)))
+        await db.commit()
+        return result.rowcount or 0
+
+
+async def run_oidc_state_cleanup(interval: float = OIDC_STATE_CLEANUP_INTERVAL):
+    """Purge expired OIDC states periodically so the login path does not have to."""
+    while True:
+        try:
+            removed = await purge_expired_oidc_states()
+            if removed:
+                logger.debug(f"Purged {removed} expired OIDC states")
+        except Exception as e:
+            logger.warning(f"Failed to purge expired OIDC states: {e}")
+        await asyncio.sleep(interval)
@@ -1,18 +1,28 @@
 import asyncio
-import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterator
 
+import ijson
+import orjson
 from core.database import db_manager
-from sqlalchemy import Date, DateTime, MetaData, Table, func, select
-from sqlalchemy.exc import NoSuchTableError, SQLAlchemyError
+from sqlalchemy import Date, DateTime, MetaData, Table, func, inspect, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+
+try:
+    import ciso8601
+except ImportError:  # pragma: no cover - optional C parser, fall back to datetime parsing
+    ciso8601 = None
 
 logger = logging.getLogger(__name__)
 
 MOCK_DATA_DIR = Path(__file__).resolve().parent.parent / "mock_data"
 MAX_CONCURRENT_LOADS = 5
+INSERT_BATCH_SIZE = 500
+# Bind parameters allowed in one statement, under asyncpg's 32767 and SQLite's default 32766 limits
+MAX_INSERT_PARAMS = 32000
 
 
 async def initialize_mock_data():
@@ -30,124 +40,175 @@ async def initialize_mock_data():
         logger.info("No mock JSON files detected; skipping mock initialization")
         return
 
+    # Reflect every target table and count their rows up front on one connection
+    try:
+        async with db_manager.engine.connect() as conn:
+            tables = await conn.run_sync(_reflect_tables, [data_file.stem for data_file in data_files])
+            row_counts = await _count_rows(conn, list(tables.values()))
+    except SQLAlchemyError as exc:
+        logger.error("Failed to reflect mock data tables: %s", exc)
+        return
+
     semaphore = asyncio.Semaphore(MAX_CONCURRENT_LOADS)
 
     async def load_file(data_file: Path):
+        table_name = data_file.stem
+        table = tables.get(table_name)
+        if table is None:
+            logger.warning("Table %s does not exist; skipping %s", table_name, data_file.name)
+            return
+        if row_counts.get(table_name):
+            logger.info("Table %s already has %d rows; skipping mock insert", table_name, row_counts[table_name])
+            return
+
         async with semaphore:
             try:
-                await _load_table_from_file(data_file)
+                await _load_table_from_file(data_file, table)
             except Exception as exc:  # pragma: no cover - defensive
                 logger.error("Unexpected error loading %s: %s", data_file.name, exc)
 
     await asyncio.gather(*(load_file(data_file) for data_file in data_files))
 
 
-def _prepare_records(raw_data: Any, table: Table) -> list[dict[str, Any]]:
-    """Filter JSON payload to match the table definition and coerce values."""
-    if isinstance(raw_data, dict):
-        records_iterable: Iterable[dict[str, Any]] = [raw_data]
-    elif isinstance(raw_data, list):
-        records_iterable = [item for item in raw_data if isinstance(item, dict)]
-    else:
-        return []
+def _iter_record_batches(data_file: Path, table: Table) -> Iterator[list[dict[str, Any]]]:
+    """Yield records matching the table definition in multi-row INSERT sized batches."""
+    # Resolve each column's coercion once instead of inspecting column types per cell
+    coercers = {column.name: _build_coercer(column) for column in table.columns}
+    # Each row binds up to one parameter per column; keep wide tables under the driver's limit
+    batch_size = min(INSERT_BATCH_SIZE, max(1, MAX_INSERT_PARAMS // len(table.columns)))
+
+    with data_file.open("rb") as fp:
+        is_array = _first_significant_byte(fp) == b"["
+        fp.seek(0)
+        if is_array:
+            # Parse array items incrementally so memory stays bounded by the batch size
+            entries: Any = ijson.items(fp, "item", use_float=True)
+        else:
+            entries = [orjson.loads(fp.read())]
+
+        batch: list[dict[str, Any]] = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            filtered = {key: coercers[key](value) for key, value in entry.items() if key in coercers}
+            if filtered:
+                batch.append(filtered)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+
+def _first_significant_byte(fp) -> bytes:
+    """Return the first non-whitespace byte of a binary file (empty at EOF)."""
+    while True:
+        char = fp.read(1)
+        if not char or not char.isspace():
+            return char
+
+
+def _build_coercer(column) -> Callable[[Any], Any]:
+    """Return the value coercion function specialized for a column's type."""
+    column_type = column.type
+    if isinstance(column_type, Date):
+        return _coerce_date
+    if isinstance(column_type, DateTime):
+        return _coerce_datetime
+    if "json" in getattr(column_type, "__visit_name__", "").lower():
+        return _identity
+    return _nested_to_json
 
-    column_map = {column.name: column for column in table.columns}
-    prepared: list[dict[str, Any]] = []
 
-    for entry in records_iterable:
-        filtered = {}
-        for key, value in entry.items():
-            if key not in column_map:
-                continue
-            column = column_map[key]
-            typed_value = _coerce_temporal_value(value, column)
-            filtered[key] = _coerce_value(typed_value, column)
-        if filtered:
-            prepared.append(filtered)
+def _identity(value: Any) -> Any:
+    return value
 
-    return prepared
 
+def _nested_to_json(value: Any) -> Any:
+    """Coerce nested structures to JSON strings for columns that are not JSON."""
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode("utf-8")
+    return value
 
-def _coerce_temporal_value(value: Any, column) -> Any:
-    """Convert ISO-like strings to Date/DateTime objects when needed."""
-    if value is None or not isinstance(value, str):
-        return value
 
-    column_type = column.type
-    if isinstance(column_type, Date):
+def _coerce_date(value: Any) -> Any:
+    """Convert `YYYY-MM-DD` strings to date objects."""
+    if isinstance(value, str):
+        if ciso8601 is not None and len(value) == 10:
+            try:
+                return ciso8601.parse_datetime(value).date()
+            except ValueError:
+                return value
         try:
             return datetime.strptime(value, "%Y-%m-%d").date()
         except ValueError:
             return value
+    return _nested_to_json(value)
 
-    if isinstance(column_type, DateTime):
-        val_wo_z = value.replace("Z", "+00:00")
-        for parser in (lambda v: datetime.fromisoformat(v), lambda v: datetime.strptime(v, "%Y-%m-%d %H:%M:%S")):
+
+def _coerce_datetime(value: Any) -> Any:
+    """Convert ISO-like strings to datetime objects."""
+    if isinstance(value, str):
+        if ciso8601 is not None:
             try:
-                return parser(val_wo_z)
+                return ciso8601.parse_datetime(value)
             except ValueError:
-                continue
-        return value
-
-    return value
-
-
-def _coerce_value(value: Any, column) -> Any:
-    """Coerce nested structures to JSON strings when the column is not JSON."""
-    if value is None:
-        return None
-
-    if isinstance(value, (dict, list)):
-        visit_name = getattr(column.type, "__visit_name__", "").lower()
-        if "json" in visit_name:
+                pass
+        val_wo_z = value.replace("Z", "+00:00")
+        try:
+            return datetime.fromisoformat(val_wo_z)
+        except ValueError:
+            pass
+        try:
+            return datetime.strptime(val_wo_z, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
             return value
-        return json.dumps(value, ensure_ascii=False)
-
-    return value
+    return _nested_to_json(value)
 
 
-async def _reflect_table(conn, table_name: str) -> Table:
-    """Reflect a table definition inside a synchronous context."""
+def _reflect_tables(sync_conn, table_names: list[str]) -> dict[str, Table]:
+    """Reflect all existing tables among `table_names` in a single pass."""
+    existing = set(inspect(sync_conn).get_table_names())
+    metadata = MetaData()
+    metadata.reflect(bind=sync_conn, only=[name for name in table_names if name in existing])
+    return dict(metadata.tables)
 
-    def _reflect(sync_conn):
-        metadata = MetaData()
-        return Table(table_name, metadata, autoload_with=sync_conn)
 
-    return await conn.run_sync(_reflect)
+async def _count_rows(conn, tables: list[Table]) -> dict[str, int]:
+    """Count rows of all tables with one SELECT of scalar subqueries."""
+    if not tables:
+        return {}
+    stmt = select(*(select(func.count()).select_from(table).scalar_subquery() for table in tables))
+    counts = (await conn.execute(stmt)).one()
+    return {table.name: count for table, count in zip(tables, counts)}
 
 
-async def _load_table_from_file(data_file: Path):
-    table_name = data_file.stem
+async def _load_table_from_file(data_file: Path, table: Table):
+    table_name = table.name
     logger.info("Processing mock data file %s for table %s", data_file.name, table_name)
 
-    async with db_manager.engine.begin() as conn:
-        try:
-            table = await _reflect_table(conn, table_name)
-        except NoSuchTableError:
-            logger.warning("Table %s does not exist; skipping %s", table_name, data_file.name)
-            return
-        except SQLAlchemyError as exc:
-            logger.error("Failed to reflect table %s: %s", table_name, exc)
-            return
-
-        row_count = await conn.scalar(select(func.count()).select_from(table))
-        if row_count and row_count > 0:
-            logger.info("Table %s already has %d rows; skipping mock insert", table_name, row_count)
-            return
-
-        try:
-            raw_records = json.loads(data_file.read_text(encoding="utf-8"))
-        except json.JSONDecodeError as exc:
-            logger.error("Invalid JSON in %s: %s", data_file.name, exc)
-            return
-
-        records = _prepare_records(raw_records, table)
-        if not records:
-            logger.warning("No valid records found in %s after preparing data", data_file.name)
-            return
+    inserted = 0
+    # Errors propagate out of the transaction block so batches already sent are rolled back
+    try:
+        async with db_manager.engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                # Stay idempotent if another worker seeds the same table concurrently
+                insert_stmt = postgresql.insert(table).on_conflict_do_nothing()
+            else:
+                insert_stmt = table.insert()
+
+            # One multi-row INSERT per batch instead of one parameter set per record
+            for batch in _iter_record_batches(data_file, table):
+                await conn.execute(insert_stmt.values(batch))
+                inserted += len(batch)
+    except (ijson.JSONError, orjson.JSONDecodeError) as exc:
+        logger.error("Invalid JSON in %s: %s", data_file.name, exc)
+        return
+    except SQLAlchemyError as exc:
+        logger.error("Failed to insert mock data into %s: %s", table_name, exc)
+        return
 
-        try:
-            await conn.execute(table.insert(), records)
-            logger.info("Inserted %d mock records into %s", len(records), table_name)
-        except SQLAlchemyError as exc:
-            logger.error("Failed to insert mock data into %s: %s", table_name, exc)
+    if not inserted:
+        logger.warning("No valid records found in %s after preparing data", data_file.name)
+        return
+    logger.info("Inserted %d mock records into %s", inserted, table_name)
@@ -1,13 +1,85 @@
+import asyncio
 import logging
+import time
+import uuid
 from decimal import ROUND_HALF_UP, Decimal
-from typing import Dict, Literal, Optional, Tuple
+from typing import Any, Callable, Dict, Literal, Optional, Tuple
 
 import stripe
+from cachetools import TLRUCache
 from core.config import settings
 from pydantic import BaseModel, Field, field_validator, model_validator
+from utils.retry import parse_retry_after, with_retry
 
 logger = logging.getLogger(__name__)
 
+# Active ISO 4217 currency codes; Stripe expresses amounts in their minor unit
+_ISO_4217_CURRENCIES = (
+    "aed afn all amd ang aoa ars aud awg azn bam bbd bdt bgn bhd bif bmd bnd bob brl bsd btn bwp byn bzd "
+    "cad cdf chf clp cny cop crc cup cve czk djf dkk dop dzd egp ern etb eur fjd fkp gbp gel ghs gip gmd "
+    "gnf gtq gyd hkd hnl htg huf idr ils inr iqd irr isk jmd jod jpy kes kgs khr kmf kpw krw kwd kyd kzt "
+    "lak lbp lkr lrd lsl lyd mad mdl mga mkd mmk mnt mop mru mur mvr mwk mxn myr mzn nad ngn nio nok npr "
+    "nzd omr pab pen pgk php pkr pln pyg qar ron rsd rub rwf sar sbd scr sdg sek sgd shp sle sll sos srd "
+    "ssp stn svc syp szl thb tjs tmt tnd top try ttd twd tzs uah ugx usd uyu uzs ves vnd vuv wst xaf xcd "
+    "xof xpf yer zar zmw zwl"
+).split()
+
+# Stripe's zero- and three-decimal currencies; every other currency is charged in hundredths
+# (including ISK, which Stripe treats as two-decimal for backwards compatibility)
+_ZERO_DECIMAL_CURRENCIES = frozenset("bif clp djf gnf jpy kmf krw mga pyg rwf ugx vnd vuv xaf xof xpf".split())
+_THREE_DECIMAL_CURRENCIES = frozenset("bhd jod kwd omr tnd".split())
+# Stripe requires three-decimal amounts to be a multiple of 10 minor units (i.e. end in 0)
+_THREE_DECIMAL_STEP = 10
+
+_CURRENCY_EXPONENT: Dict[str, int] = {
+    code: 0 if code in _ZERO_DECIMAL_CURRENCIES else 3 if code in _THREE_DECIMAL_CURRENCIES else 2
+    for code in _ISO_4217_CURRENCIES
+}
+
+# Placeholder Stripe substitutes with the session id in success/return URLs
+_CSID = "{CHECKOUT_SESSION_ID}"
+
+# Checkout status is polled by success pages; cache it briefly while the session is still moving
+# and for longer once it can no longer change
+CHECKOUT_STATUS_CACHE_SIZE = 4096
+CHECKOUT_STATUS_PENDING_TTL = 10
+CHECKOUT_STATUS_TERMINAL_TTL = 600
+
+
+def _checkout_status_ttu(_session_id: str, response: "CheckoutStatusResponse", now: float) -> float:
+    """Expiry time for a cached checkout status, based on whether the session is final."""
+    terminal = response.status == "expired" or (
+        response.status == "complete" and response.payment_status in ("paid", "no_payment_required")
+    )
+    return now + (CHECKOUT_STATUS_TERMINAL_TTL if terminal else CHECKOUT_STATUS_PENDING_TTL)
+
+
+_checkout_status_cache: TLRUCache = TLRUCache(maxsize=CHECKOUT_STATUS_CACHE_SIZE, ttu=_checkout_status_ttu)
+
+
+def _checkout_status_cache_enabled() -> bool:
+    """Feature flag for the checkout status cache (STRIPE_STATUS_CACHE_ENABLED, on by default)."""
+    value = getattr(settings, "stripe_status_cache_enabled", "true")
+    return str(value).strip().lower() not in ("0", "false", "no", "off")
+
+
+async def _stripe_call(async_fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Call an async Stripe API method, retrying transient failures with jittered exponential backoff."""
+    return await with_retry(
+        lambda: async_fn(*args, **kwargs), retry_if=_is_retryable_stripe_error, retry_after=_stripe_retry_after
+    )
+
+
+def _is_retryable_stripe_error(error: BaseException) -> bool:
+    """Rate limits, connection failures and 5xx responses are worth retrying."""
+    return isinstance(error, stripe.error.StripeError) and _classify_stripe_error(error)[1]
+
+
+def _stripe_retry_after(error: BaseException) -> Optional[float]:
+    """Delay requested by Stripe through the Retry-After header, if any."""
+    headers = getattr(error, "headers", None) or {}
+    return parse_retry_after(headers.get("retry-after") or headers.get("Retry-After"))
+
 
 class CheckoutSessionRequest(BaseModel):
     """Request model for creating a checkout session."""
@@ -30,6 +102,14 @@ class CheckoutSessionRequest(BaseModel):
     metadata: Optional[Dict[str, str]] = Field(None, description="Additional metadata to store with the session")
     idempotency_key: Optional[str] = Field(None, description="Idempotency key to avoid duplicate sessions")
 
+    @field_validator("currency")
+    @classmethod
+    def validate_currency(cls, v):
+        code = v.strip().lower()
+        if code not in _CURRENCY_EXPONENT:
+            raise ValueError(f"Unsupported currency code: {v}")
+        return code
+
     @field_validator("amount")
     @classmethod
     def validate_amount(cls, v):
@@ -62,12 +142,12 @@ class CheckoutSessionRequest(BaseModel):
         if self.ui_mode == "embedded":
             if not self.return_url:
                 raise ValueError("return_url is required when ui_mode='embedded'")
-            if "{CHECKOUT_SESSION_ID}" not in self.return_url:
+            if _CSID not in self.return_url:
                 raise ValueError("return_url must include {CHECKOUT_SESSION_ID}")
         else:  # hosted
             if not self.success_url or not self.cancel_url:
                 raise ValueError("success_url and cancel_url are required when ui_mode='hosted'")
-            if "{CHECKOUT_SESSION_ID}" not in (self.success_url or ""):
+            if _CSID not in self.success_url:
                 raise ValueError("success_url must include {CHECKOUT_SESSION_ID}")
 
         return self
@@ -141,22 +221,77 @@ def _classify_stripe_error(error: stripe.error.StripeError) -> Tuple[str, bool,
     return error_type, is_retryable, fixable, fix_suggestion
 
 
+# In-flight Stripe (re)initialization shared by concurrent requests, so they trigger at most one
+# Account.retrieve and all fail together instead of queueing behind each other
+_stripe_init_task: Optional[asyncio.Task] = None
+
+# Secret key that already passed the Account.retrieve check in this process
+_stripe_verified_key: Optional[str] = None
+
+# Attempts for the Account.retrieve check; requests are waiting on it, so a single retry is enough
+STRIPE_INIT_MAX_ATTEMPTS = 2
+# Seconds a failed initialization is replayed to new requests before Stripe is tried again
+STRIPE_INIT_FAILURE_TTL = 5.0
+# (monotonic time, secret key, error) of the last failed initialization
+_stripe_init_failure: Optional[Tuple[float, Optional[str], "CheckoutError"]] = None
+
+
+def _stripe_ready() -> bool:
+    """Whether the active Stripe key is one that already passed initialize_stripe's check."""
+    return bool(stripe.api_key) and stripe.api_key == _stripe_verified_key
+
+
+def reset_stripe_cache():
+    """Forget the verified Stripe key so the next request re-validates it (used by tests)."""
+    global _stripe_verified_key, _stripe_init_task, _stripe_init_failure
+    _stripe_verified_key = None
+    _stripe_init_task = None
+    _stripe_init_failure = None
+    stripe.api_key = None
+
+
+async def _initialize_stripe_shared(stripe_key: Optional[str]):
+    """Run initialize_stripe, remembering a failure so requests arriving soon after re-raise it."""
+    global _stripe_init_failure
+    try:
+        await initialize_stripe()
+    except CheckoutError as e:
+        _stripe_init_failure = (time.monotonic(), stripe_key, e)
+        raise
+    _stripe_init_failure = None
+
+
+def _ensure_stripe_http_client():
+    """Install one process-wide httpx-backed Stripe client so all Stripe calls share a keep-alive pool."""
+    if stripe.default_http_client is not None:
+        return
+    stripe.default_http_client = stripe.HTTPXClient(verify_ssl_certs=stripe.verify_ssl_certs, proxy=stripe.proxy)
+
+
 async def initialize_stripe():
     """Initialize Stripe configuration
 
     Raises:
         CheckoutError: If Stripe initialization fails with a fixable error
     """
+    _ensure_stripe_http_client()
 
     stripe_key = settings.stripe_secret_key
     if not stripe_key:
         logger.warning("Error: Stripe key is empty or None")
         return
 
+    global _stripe_verified_key
     try:
         stripe.api_key = stripe_key
         # Test Stripe connection
-        await stripe.Account.retrieve_async()
+        await with_retry(
+            stripe.Account.retrieve_async,
+            retry_if=_is_retryable_stripe_error,
+            retry_after=_stripe_retry_after,
+            max_attempts=STRIPE_INIT_MAX_ATTEMPTS,
+        )
+        _stripe_verified_key = stripe_key
         logger.info("Stripe API key set successfully")
 
     except stripe.error.AuthenticationError as e:
@@ -201,6 +336,61 @@ async def initialize_stripe():
         )
 
 
+def _build_subscription_params(request: CheckoutSessionRequest) -> Dict[str, Any]:
+    """Checkout session parameters for a recurring Price."""
+    return {
+        "line_items": [{"price": request.stripe_price_id, "quantity": request.quantity}],
+        "mode": "subscription",
+        "metadata": request.metadata or {},
+    }
+
+
+def _build_price_id_payment_params(request: CheckoutSessionRequest) -> Dict[str, Any]:
+    """Checkout session parameters for a one-off payment of an existing Price."""
+    return {
+        "line_items": [{"price": request.stripe_price_id, "quantity": request.quantity}],
+        "mode": "payment",
+        "metadata": request.metadata or {},
+    }
+
+
+def _build_amount_payment_params(request: CheckoutSessionRequest) -> Dict[str, Any]:
+    """Checkout session parameters for a one-off payment of an ad-hoc amount."""
+    # Convert amount to the currency's smallest unit (e.g. cents; yen as-is) with safe rounding
+    exponent = _CURRENCY_EXPONENT[request.currency]
+    step = _THREE_DECIMAL_STEP if exponent == 3 else 1
+    minor_units = request.amount.scaleb(exponent) / step
+    amount_in_cents = int(minor_units.to_integral_value(rounding=ROUND_HALF_UP)) * step
+    return {
+        "line_items": [
+            {
+                "price_data": {
+                    "currency": request.currency,
+                    "product_data": {"name": "Payment"},
+                    "unit_amount": amount_in_cents,
+                },
+                "quantity": request.quantity,
+            }
+        ],
+        "mode": "payment",
+        "metadata": request.metadata or {},
+    }
+
+
+def _build_embedded_ui_params(request: CheckoutSessionRequest) -> Dict[str, Any]:
+    return {"ui_mode": "embedded", "return_url": request.return_url}
+
+
+def _build_hosted_ui_params(request: CheckoutSessionRequest) -> Dict[str, Any]:
+    return {"success_url": request.success_url, "cancel_url": request.cancel_url}
+
+
+_UI_MODE_PARAM_BUILDERS: Dict[str, Callable[[CheckoutSessionRequest], Dict[str, Any]]] = {
+    "embedded": _build_embedded_ui_params,
+    "hosted": _build_hosted_ui_params,
+}
+
+
 class PaymentService:
     """Payment service class, handles Stripe integration"""
 
@@ -220,36 +410,14 @@ class PaymentService:
         try:
             logger.info(f"create checkout session with request: {request}")
 
-            # Prepare line items based on payment method/mode
+            # Prepare session parameters based on payment method/mode and UI mode
             if request.mode == "subscription":
-                line_items = [
-                    {
-                        "price": request.stripe_price_id,
-                        "quantity": request.quantity,
-                    }
-                ]
+                params = _build_subscription_params(request)
             elif request.amount is not None:
-                # Convert amount to cents/smallest currency unit with safe rounding
-                amount_in_cents = int((request.amount * Decimal("100")).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
-                line_items = [
-                    {
-                        "price_data": {
-                            "currency": request.currency,
-                            "product_data": {
-                                "name": "Payment",
-                            },
-                            "unit_amount": amount_in_cents,
-                        },
-                        "quantity": request.quantity,
-                    }
-                ]
+                params = _build_amount_payment_params(request)
             else:
-                line_items = [
-                    {
-                        "price": request.stripe_price_id,
-                        "quantity": request.quantity,
-                    }
-                ]
+                params = _build_price_id_payment_params(request)
+            params.update(_UI_MODE_PARAM_BUILDERS[request.ui_mode](request))
 
             # Ensure stripe
             await self._auto_reload_stripe_config()
@@ -257,29 +425,13 @@ class PaymentService:
             # Create the checkout session
             logger.info("Calling Stripe API to create checkout session...")
 
-            params = {
-                "line_items": line_items,
-                "mode": request.mode,
-                "metadata": request.metadata or {},
-            }
-
-            if request.ui_mode == "embedded":
-                params["ui_mode"] = "embedded"
-                params["return_url"] = request.return_url
-            else:
-                params["success_url"] = request.success_url
-                params["cancel_url"] = request.cancel_url
-
-            creation_kwargs = {}
-            if request.idempotency_key:
-                creation_kwargs["idempotency_key"] = request.idempotency_key
+            # Always send an idempotency key so retried requests cannot create duplicate sessions
+            creation_kwargs = {"idempotency_key": request.idempotency_key or str(uuid.uuid4())}
 
-            session = await stripe.checkout.Session.create_async(
-                **params,
-                **creation_kwargs,
-            )
+            session = await _stripe_call(stripe.checkout.Session.create_async, **params, **creation_kwargs)
 
-            return CheckoutSessionResponse(
+            # Built from Stripe's response, which needs no re-validation
+            return CheckoutSessionResponse.model_construct(
                 url=getattr(session, "url", None),
                 client_secret=getattr(session, "client_secret", None),
                 session_id=session.id,
@@ -287,18 +439,15 @@ class PaymentService:
 
         except stripe.error.StripeError as e:
             error_type, is_retryable, fixable, fix_suggestion = _classify_stripe_error(e)
-            error_msg = f"Failed to create checkout session: {str(e)}"
-            if hasattr(e, "param"):
-                error_msg += f" (parameter: {e.param})"
-            if hasattr(e, "code"):
-                error_msg += f" (code: {e.code})"
             raise CheckoutError(
-                error_msg,
+                f"Failed to create checkout session: {str(e)}",
                 error_type=error_type,
                 is_retryable=is_retryable,
                 fixable=fixable,
                 fix_suggestion=fix_suggestion,
                 original_error=e,
+                param=getattr(e, "param", None),
+                code=getattr(e, "code", None),
             )
         except CheckoutError:
             # Re-raise CheckoutError as-is (from _auto_reload_stripe_config)
@@ -326,34 +475,41 @@ class PaymentService:
         Raises:
             CheckoutError: If there"s an error retrieving the session status.
         """
+        cache_enabled = _checkout_status_cache_enabled()
+        if cache_enabled:
+            cached = _checkout_status_cache.get(checkout_session_id)
+            if cached is not None:
+                return cached
+
         try:
             # Ensure stripe config is loaded
             await self._auto_reload_stripe_config()
 
-            session = await stripe.checkout.Session.retrieve_async(checkout_session_id)
+            session = await _stripe_call(stripe.checkout.Session.retrieve_async, checkout_session_id)
 
-            return CheckoutStatusResponse(
+            # metadata is copied out of the StripeObject so the cached response holds a plain dict
+            response = CheckoutStatusResponse(
                 status=session.status,
                 payment_status=session.payment_status,
                 amount_total=session.amount_total,
                 currency=session.currency,
-                metadata=session.metadata,
+                metadata=dict(session.metadata or {}),
             )
+            if cache_enabled:
+                _checkout_status_cache[checkout_session_id] = response
+            return response
 
         except stripe.error.StripeError as e:
             error_type, is_retryable, fixable, fix_suggestion = _classify_stripe_error(e)
-            error_msg = f"Failed to retrieve session status for session_id={checkout_session_id}: {str(e)}"
-            if hasattr(e, "param"):
-                error_msg += f" (parameter: {e.param})"
-            if hasattr(e, "code"):
-                error_msg += f" (code: {e.code})"
             raise CheckoutError(
-                error_msg,
+                f"Failed to retrieve session status for session_id={checkout_session_id}: {str(e)}",
                 error_type=error_type,
                 is_retryable=is_retryable,
                 fixable=fixable,
                 fix_suggestion=fix_suggestion,
                 original_error=e,
+                param=getattr(e, "param", None),
+                code=getattr(e, "code", None),
             )
         except CheckoutError:
             # Re-raise CheckoutError as-is (from _auto_reload_stripe_config)
@@ -371,11 +527,29 @@ class PaymentService:
     @staticmethod
     async def _auto_reload_stripe_config():
         """Auto reload Stripe configuration"""
-        if stripe.api_key:
+        # Returns without suspending once initialization has completed
+        if _stripe_ready():
             return
 
         # Settings are automatically read from environment variables
-        await initialize_stripe()
+        stripe_key = getattr(settings, "stripe_secret_key", None)
+        if stripe_key and stripe_key == _stripe_verified_key:
+            # Key was already validated in this process; skip the Account.retrieve round-trip
+            stripe.api_key = stripe_key
+            return
+
+        # Fail fast while a recent attempt with the same key is still known to have failed
+        failure = _stripe_init_failure
+        if failure and failure[1] == stripe_key and time.monotonic() - failure[0] < STRIPE_INIT_FAILURE_TTL:
+            raise failure[2]
+
+        # Join the initialization already in flight, or start one; every waiter gets its outcome
+        global _stripe_init_task
+        task = _stripe_init_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = _stripe_init_task = asyncio.create_task(_initialize_stripe_shared(stripe_key))
+        # Shielded so one cancelled request does not abort the initialization for the others
+        await asyncio.shield(task)
 
 
 class CheckoutError(Exception):
@@ -387,6 +561,8 @@ class CheckoutError(Exception):
         fixable: Whether the error can be fixed by the agent
         fix_suggestion: Suggested fix for the error
         original_error: The original exception that caused this error
+        param: Request parameter Stripe reported as the cause, if any
+        code: Stripe error code, if any
     """
 
     def __init__(
@@ -397,6 +573,8 @@ class CheckoutError(Exception):
         fixable: bool = False,
         fix_suggestion: Optional[str] = None,
         original_error: Optional[Exception] = None,
+        param: Optional[str] = None,
+        code: Optional[str] = None,
     ):
         super().__init__(message)
         self.error_type = error_type
@@ -404,9 +582,16 @@ class CheckoutError(Exception):
         self.fixable = fixable
         self.fix_suggestion = fix_suggestion
         self.original_error = original_error
+        self.param = param
+        self.code = code
 
     def __str__(self):
+        # Assembled only when the error is actually rendered
         base_msg = super().__str__()
+        if self.param:
+            base_msg += f" (parameter: {self.param})"
+        if self.code:
+            base_msg += f" (code: {self.code})"
         details = [f"[Type: {self.error_type}]"]
         if self.is_retryable:
             details.append("[Retryable: Yes]")
@@ -1,15 +1,19 @@
+import functools
+import hashlib
 import logging
-from typing import Literal, Optional, Union
-from urllib.parse import urljoin
+from typing import AsyncIterator, Literal, Optional, Union
 
 import httpx
 import mimetypes
+import orjson
+from cachetools import TTLCache
 from core.config import settings
 from schemas.storage import (
     BucketInfo,
     BucketListResponse,
     BucketRequest,
     BucketResponse,
+    BulkObjectRequest,
     DeleteResponse,
     FileUpDownRequest,
     FileUpDownResponse,
@@ -20,9 +24,98 @@ from schemas.storage import (
     RenameRequest,
     RenameResponse,
 )
+from utils.retry import parse_retry_after, with_retry
 
 logger = logging.getLogger(__name__)
 
+# OSS endpoint templates, relative to the shared client's base_url; formatted with the bucket name
+_BUCKETS_ENDPOINT = "api/v1/infra/client/oss/buckets"
+_OBJECTS_ENDPOINT = _BUCKETS_ENDPOINT + "/{}/objects"
+_OBJECT_METADATA_ENDPOINT = _OBJECTS_ENDPOINT + "/metadata"
+_OBJECT_RENAME_ENDPOINT = _OBJECTS_ENDPOINT + "/rename"
+_UPLOAD_URL_ENDPOINT = _OBJECTS_ENDPOINT + "/upload_url"
+_DOWNLOAD_URL_ENDPOINT = _OBJECTS_ENDPOINT + "/download_url"
+
+# Responses that mean "try again later" without the request having been processed
+RETRYABLE_OSS_STATUS_CODES = frozenset({429, 503})
+# A 503 may come from a proxy after the service already acted on the request, so non-idempotent
+# POSTs (create bucket, rename) are only retried when rate limited or when they never got sent
+RETRYABLE_OSS_POST_STATUS_CODES = frozenset({429})
+
+# Load the platform MIME tables once at import instead of lazily inside a request
+mimetypes.init()
+
+# Bucket listings per OSS credential, kept briefly so repeated visibility checks skip the OSS round-trip
+_bucket_list_cache: TTLCache = TTLCache(maxsize=1024, ttl=30)
+
+# Shared across requests so OSS calls reuse pooled keep-alive connections instead of a new TLS handshake
+_http_client: httpx.AsyncClient | None = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide ObjectStorage client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=settings.oss_service_url,
+            headers={
+                "Authorization": f"Bearer {settings.oss_api_key}",
+                "Content-Type": "application/json",
+            },
+            timeout=120.0,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=200),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared ObjectStorage client (called on application shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _guess_content_type(object_key: str) -> str:
+    """Content type for an object key, defaulting to application/octet-stream."""
+    # guess_type only looks at the suffixes, so memoize on them for a high hit rate across distinct names;
+    # taken from the last path component so dots in directory names never leak into the cache key
+    name = object_key.rpartition("/")[2]
+    dot = name.find(".")
+    return _guess_content_type_for_suffixes(name[dot:] if dot >= 0 else "")
+
+
+@functools.lru_cache(maxsize=256)
+def _guess_content_type_for_suffixes(suffixes: str) -> str:
+    content_type, _ = mimetypes.guess_type(f"object{suffixes}")
+    return content_type or "application/octet-stream"
+
+
+def _bucket_cache_key() -> str:
+    """Cache key identifying the current OSS credential without keeping the key itself in memory."""
+    return hashlib.sha256(settings.oss_api_key.encode()).hexdigest()
+
+
+def _is_retryable_oss_error(error: BaseException) -> bool:
+    """Throttling/unavailable responses and failures to connect are safe to retry."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_OSS_STATUS_CODES
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+def _is_retryable_oss_post_error(error: BaseException) -> bool:
+    """Only rate limiting and failures to connect are safe to retry for a POST."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_OSS_POST_STATUS_CODES
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+def _oss_retry_after(error: BaseException) -> Optional[float]:
+    """Delay requested by the ObjectStorage service through the Retry-After header, if any."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return parse_retry_after(error.response.headers.get("retry-after"))
+    return None
+
 
 class StorageService:
     """Service for handling file upload and display with ObjectStorage service integration."""
@@ -31,20 +124,19 @@ class StorageService:
         if not settings.oss_service_url or not settings.oss_api_key:
             raise ValueError("OSS service not configured. Set OSS_SERVICE_URL and OSS_API_KEY.")
 
-        self.headers = {
-            "Authorization": f"Bearer {settings.oss_api_key}",
-            "Content-Type": "application/json",
-        }
+        self._client = _get_http_client()
 
     async def create_bucket(self, request: BucketRequest) -> BucketResponse:
         """
         Create a bucket name
         """
-        endpoint = "api/v1/infra/client/oss/buckets"
+        endpoint = _BUCKETS_ENDPOINT
         payload = {"bucket_name": request.bucket_name, "visibility": request.visibility}
         try:
             result = await self._apost_oss_service(endpoint, payload)
-            return BucketResponse(bucket_name=result.get("bucket_name"), created_at=result.get("created_at"))
+            # Make the new bucket show up in the next listing
+            _bucket_list_cache.pop(_bucket_cache_key(), None)
+            return BucketResponse(bucket_name=result.get("bucket_name"), created_at=result.get("created_at", ""))
         except Exception as e:
             logger.error(f"Failed to create bucket: {e}")
             raise
@@ -53,12 +145,19 @@ class StorageService:
         """
         List buckets of the user
         """
-        endpoint = "api/v1/infra/client/oss/buckets"
+        endpoint = _BUCKETS_ENDPOINT
+        cache_key = _bucket_cache_key()
+        cached = _bucket_list_cache.get(cache_key)
+        if cached is not None:
+            return cached
         try:
             result = await self._aget_oss_service(endpoint=endpoint, params={})
             list_buckets = BucketListResponse()
             for item in result["buckets"]:
-                list_buckets.buckets.append(BucketInfo(bucket_name=item["bucket_name"], visibility=item["visibility"]))
+                list_buckets.buckets.append(
+                    BucketInfo.model_construct(bucket_name=item["bucket_name"], visibility=item["visibility"])
+                )
+            _bucket_list_cache[cache_key] = list_buckets
             return list_buckets
         except Exception as e:
             logger.error(f"Failed to list buckets: {e}")
@@ -68,46 +167,52 @@ class StorageService:
         """
         List objests from the bucket
         """
-        endpoint = f"api/v1/infra/client/oss/buckets/{request.bucket_name}/objects"
         try:
-            result = await self._aget_oss_service(endpoint=endpoint, params={})
-            list_objs = ObjectListResponse()
-            for item in result["objects"]:
-                list_objs.objects.append(
-                    ObjectInfo(
-                        bucket_name=request.bucket_name,
-                        object_key=item["key"],
-                        size=item["size"],
-                        last_modified=item["last_modified"],
-                        etag=item["etag"],
-                    )
-                )
-            return list_objs
+            return ObjectListResponse.model_construct(objects=[obj async for obj in self.iter_objects(request)])
         except Exception as e:
             logger.error(f"Failed to list bucket objects: {e}")
             raise
 
+    async def iter_objects(self, request: OSSBaseModel) -> AsyncIterator[ObjectInfo]:
+        """
+        Iterate objects of the bucket as they are read from the OSS listing
+        """
+        # The OSS listing contract has no confirmed limit/marker paging, so request it in one call
+        endpoint = _OBJECTS_ENDPOINT.format(request.bucket_name)
+        result = await self._aget_oss_service(endpoint=endpoint, params={})
+        for item in result["objects"]:
+            # bucket_name was validated on the request; the rest is trusted OSS output
+            yield ObjectInfo.model_construct(
+                bucket_name=request.bucket_name,
+                object_key=item["key"],
+                size=item["size"],
+                last_modified=item["last_modified"],
+                etag=item["etag"],
+            )
+
     async def get_object_info(self, request: ObjectRequest) -> ObjectInfo:
         """
         Get object metadata from the bucket
         """
         try:
-            endpoint = f"api/v1/infra/client/oss/buckets/{request.bucket_name}/objects/metadata"
+            endpoint = _OBJECT_METADATA_ENDPOINT.format(request.bucket_name)
             params = {"object_key": request.object_key}
             result = await self._aget_oss_service(endpoint, params)
-            return ObjectInfo(
-                bucket_name=request.bucket_name,
-                object_key=result["key"],
-                size=result["size"],
-                last_modified=result["last_modified"],
-                etag=result["etag"],
+            return ObjectInfo.model_validate(
+                {
+                    "bucket_name": request.bucket_name,
+                    "object_key": result["key"],
+                    "size": result["size"],
+                    "last_modified": result["last_modified"],
+                    "etag": result["etag"],
+                }
             )
         except Exception as e:
             logger.error(f"Failed to get object metadata: {e}")
             raise
 
     async def rename_object(self, request: RenameRequest) -> dict:
-        endpoint = f"api/v1/infra/client/oss/buckets/{request.bucket_name}/objects/rename"
+        endpoint = _OBJECT_RENAME_ENDPOINT.format(request.bucket_name)
         payload = {
             "overwrite_key": request.overwrite_key,
             "source_key": request.source_key,
@@ -121,20 +226,28 @@ class StorageService:
             raise
 
     async def delete_object(self, request: ObjectRequest) -> DeleteResponse:
-        endpoint = f"api/v1/infra/client/oss/buckets/{request.bucket_name}/objects"
-        payload = {"object_keys": [request.object_key]}
+        return await self.delete_objects(
+            BulkObjectRequest(bucket_name=request.bucket_name, object_keys=[request.object_key])
+        )
+
+    async def delete_objects(self, request: BulkObjectRequest) -> DeleteResponse:
+        """
+        Delete several objects from the bucket in one OSS call
+        """
+        endpoint = _OBJECTS_ENDPOINT.format(request.bucket_name)
+        payload = {"object_keys": request.object_keys}
         try:
             await self._adelete_oss_service(endpoint, payload)
             return DeleteResponse(success=True)
         except Exception as e:
-            logger.error(f"Failed to rename object: {e}")
+            logger.error(f"Failed to delete objects: {e}")
             raise
 
     async def create_upload_url(self, request: FileUpDownRequest) -> FileUpDownResponse:
         """
         Create presigned URL for file upload with access URL.
         """
-        endpoint = f"/api/v1/infra/client/oss/buckets/{request.bucket_name}/objects/upload_url"
+        endpoint = _UPLOAD_URL_ENDPOINT.format(request.bucket_name)
         payload = {"expires_in": 0, "object_key": request.object_key}
         try:
             result = await self._apost_oss_service(endpoint, payload)
@@ -151,10 +264,8 @@ class StorageService:
         """
         Create presigned URL for file download with access URL.
         """
-        endpoint = f"/api/v1/infra/client/oss/buckets/{request.bucket_name}/objects/download_url"
-        content_type, _ = mimetypes.guess_type(str(request.object_key))
-        if not content_type:
-            content_type = "application/octet-stream"
+        endpoint = _DOWNLOAD_URL_ENDPOINT.format(request.bucket_name)
+        content_type = _guess_content_type(str(request.object_key))
         payload = {
             "content_type": content_type,  # like "image/jpeg"
             "expires_in": 0,
@@ -189,27 +300,25 @@ class StorageService:
         payload: Optional[dict] = None,
     ) -> Union[dict, list]:
         """统一的 OSS 服务请求方法"""
-        url = urljoin(settings.oss_service_url, endpoint)
+
+        async def send() -> httpx.Response:
+            # Endpoints are resolved relative to the client's base_url
+            response = await self._client.request(method=method, url=endpoint, params=params, json=payload)
+            response.raise_for_status()
+            return response
 
         try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=self.headers,
-                    params=params,
-                    json=payload,
-                )
-                response.raise_for_status()
-                result = response.json()
+            retry_if = _is_retryable_oss_post_error if method == "POST" else _is_retryable_oss_error
+            response = await with_retry(send, retry_if=retry_if, retry_after=_oss_retry_after)
+            result = orjson.loads(response.content)
 
-                if result.get("code") != 0:
-                    logger.warning(f"ObjectStorage service error: {result}")
-                    error_msg = result.get("error", "Unknown error")
-                    message = result.get("message", "")
-                    raise ValueError(f"ObjectStorage service error: {error_msg}. {message}")
+            if result.get("code") != 0:
+                logger.warning(f"ObjectStorage service error: {result}")
+                error_msg = result.get("error", "Unknown error")
+                message = result.get("message", "")
+                raise ValueError(f"ObjectStorage service error: {error_msg}. {message}")
 
-                return result.get("data", [])
+            return result.get("data", [])
         except httpx.HTTPStatusError as e:
             error_msg = f"ObjectStorage service HTTP error: {e.response.status_code} - {e.response.text}"
             logger.error(error_msg)
@@ -3,7 +3,7 @@ import time
 from typing import Optional
 
 from models.auth import User
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
@@ -13,30 +13,69 @@ class UserService:
     @staticmethod
     async def get_user_profile(db: AsyncSession, user_id: str) -> Optional[User]:
         """Get user profile by user ID."""
-        start_time = time.time()
-        logger.debug(f"[DB_OP] Starting get_user_profile - user_id: {user_id}")
+        # Timing and log formatting only run when DEBUG output is actually enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            start_time = time.perf_counter()
+            logger.debug("[DB_OP] Starting get_user_profile - user_id: %s", user_id)
         result = await db.execute(select(User).where(User.id == user_id))
         user = result.scalar_one_or_none()
-        logger.debug(
-            f"[DB_OP] Get user profile completed in {time.time() - start_time:.4f}s - found: {user is not None}"
-        )
+        if debug:
+            logger.debug(
+                "[DB_OP] Get user profile completed in %.4fs - found: %s",
+                time.perf_counter() - start_time,
+                user is not None,
+            )
         return user
 
     @staticmethod
     async def update_user_profile(db: AsyncSession, user_id: str, name: Optional[str] = None) -> Optional[User]:
         """Update user profile."""
-        start_time = time.time()
-        logger.debug(f"[DB_OP] Starting update_user_profile - user_id: {user_id}")
+        if name is None:
+            # Nothing to write; behave like a plain lookup
+            return await UserService.get_user_profile(db, user_id)
+
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if db.get_bind().dialect.update_returning:
+            # Write and read back the row in a single round-trip
+            if debug:
+                start_time = time.perf_counter()
+                logger.debug("[DB_OP] Starting update_user_profile (UPDATE...RETURNING) - user_id: %s", user_id)
+            stmt = (
+                update(User)
+                .where(User.id == user_id)
+                .values(name=name)
+                .returning(User)
+                .execution_options(synchronize_session=False, populate_existing=True)
+            )
+            user = (await db.execute(stmt)).scalar_one_or_none()
+            await db.commit()
+            if debug:
+                logger.debug(
+                    "[DB_OP] User profile update completed in %.4fs - found: %s",
+                    time.perf_counter() - start_time,
+                    user is not None,
+                )
+            return user
+
+        if debug:
+            start_time = time.perf_counter()
+            logger.debug("[DB_OP] Starting update_user_profile - user_id: %s", user_id)
         result = await db.execute(select(User).where(User.id == user_id))
         user = result.scalar_one_or_none()
-        logger.debug(f"[DB_OP] User lookup completed in {time.time() - start_time:.4f}s - found: {user is not None}")
+        if debug:
+            logger.debug(
+                "[DB_OP] User lookup completed in %.4fs - found: %s", time.perf_counter() - start_time, user is not None
+            )
 
-        if user and name is not None:
-            start_time_update = time.time()
-            logger.debug("[DB_OP] Starting user profile update")
+        if user:
+            if debug:
+                start_time_update = time.perf_counter()
+                logger.debug("[DB_OP] Starting user profile update")
             user.name = name
             await db.commit()
             await db.refresh(user)
-            logger.debug(f"[DB_OP] User profile update completed in {time.time() - start_time_update:.4f}s")
+            if debug:
+                logger.debug("[DB_OP] User profile update completed in %.4fs", time.perf_counter() - start_time_update)
 
         return user
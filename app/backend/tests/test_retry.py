@@ -0,0 +1,91 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from utils.retry import parse_retry_after, with_retry
+
+
+class TransientError(Exception):
+    pass
+
+
+class PermanentError(Exception):
+    pass
+
+
+def _failing(times: int, result: str = "ok"):
+    """Return an async callable failing `times` times with TransientError, then returning `result`."""
+    calls = {"count": 0}
+
+    async def fn():
+        calls["count"] += 1
+        if calls["count"] <= times:
+            raise TransientError(f"attempt {calls['count']}")
+        return result
+
+    return fn, calls
+
+
+def _retry(fn, **kwargs):
+    kwargs.setdefault("retry_if", lambda exc: isinstance(exc, TransientError))
+    kwargs.setdefault("retry_after", lambda exc: 0)
+    return asyncio.run(with_retry(fn, **kwargs))
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after("0.5") == 0.5
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = parse_retry_after(format_datetime(retry_at, usegmt=True))
+    # HTTP dates have one-second resolution
+    assert 28 <= delay <= 30
+
+
+def test_parse_retry_after_http_date_in_the_past():
+    retry_at = datetime.now(timezone.utc) - timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(retry_at, usegmt=True)) < 0
+
+
+@pytest.mark.parametrize("value", [None, "", "soon", "Mon, 99 Foo 2024"])
+def test_parse_retry_after_invalid(value):
+    assert parse_retry_after(value) is None
+
+
+def test_with_retry_succeeds_after_transient_failures():
+    fn, calls = _failing(2)
+    assert _retry(fn, max_attempts=5) == "ok"
+    assert calls["count"] == 3
+
+
+def test_with_retry_stops_after_max_attempts():
+    fn, calls = _failing(10)
+    with pytest.raises(TransientError, match="attempt 3"):
+        _retry(fn, max_attempts=3)
+    assert calls["count"] == 3
+
+
+def test_with_retry_stops_at_deadline():
+    fn, calls = _failing(10)
+    started = time.monotonic()
+    with pytest.raises(TransientError, match="attempt 2"):
+        # The second attempt starts after the deadline has passed, so no third one is made
+        _retry(fn, retry_after=lambda exc: 0.2, max_attempts=10, deadline=0.1)
+    assert calls["count"] == 2
+    assert time.monotonic() - started < 1
+
+
+def test_with_retry_does_not_retry_permanent_errors():
+    calls = {"count": 0}
+
+    async def fn():
+        calls["count"] += 1
+        raise PermanentError("nope")
+
+    with pytest.raises(PermanentError):
+        _retry(fn, max_attempts=5)
+    assert calls["count"] == 1
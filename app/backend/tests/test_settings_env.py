@@ -0,0 +1,49 @@
+import pytest
+from routers import settings as settings_router
+
+
+def _legacy_read_env_file(path):
+    """The original line-by-line parser read_env_file must stay compatible with."""
+    env_vars = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#") and "=" in line:
+                key, value = line.split("=", 1)
+                env_vars[key.strip()] = value.strip()
+    return env_vars
+
+
+@pytest.fixture
+def env_file(tmp_path, monkeypatch):
+    path = tmp_path / ".env"
+    monkeypatch.setitem(settings_router._ENV_PATHS, "backend", path)
+    return path
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "A=1\nB=2\n",
+        "A=1\r\nB=2\r\n",
+        "A=1\rB=2\r",
+        "A=1\r\n\rB=2",
+        "  A  =  1  \n\tB\t=\t2\t",
+        "\vA=1\f\n\fB=\v2\x1c",
+        "\xa0A\xa0=\xa01\xa0\n　B=2　",
+        "# comment\n  # indented comment\n#A=1\nB=2",
+        "=value\n  =  \nA=",
+        "A=b=c\nURL=postgres://u:p@h/db?x=1",
+        "A=1\nA=2",
+        "no assignment\n\n   \n",
+        "A=1 # not a comment",
+        "",
+    ],
+)
+def test_read_env_file_matches_legacy_parser(env_file, content):
+    env_file.write_bytes(content.encode("utf-8"))
+    assert settings_router.read_env_file("backend") == _legacy_read_env_file(env_file)
+
+
+def test_read_env_file_missing(env_file):
+    assert settings_router.read_env_file("backend") == {}
@@ -0,0 +1,94 @@
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, stop_after_delay, wait_random_exponential
+from tenacity.wait import wait_base
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_MAX_ATTEMPTS = 8
+# No new attempt is started once this many seconds have passed since the first one
+DEFAULT_RETRY_DEADLINE = 60.0
+BACKOFF_MULTIPLIER = 0.25
+MAX_RETRY_WAIT = 30.0
+
+
+class _wait_retry_after(wait_base):
+    """Wait as long as the failed call's Retry-After asks, else fall back to jittered backoff."""
+
+    def __init__(self, fallback: wait_base, retry_after: Callable[[BaseException], Optional[float]]):
+        self.fallback = fallback
+        self.retry_after = retry_after
+
+    def __call__(self, retry_state) -> float:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        delay = self.retry_after(exc) if exc is not None else None
+        if delay is not None:
+            return min(max(delay, 0.0), MAX_RETRY_WAIT)
+        return self.fallback(retry_state)
+
+
+def _log_retry(retry_state) -> None:
+    exc = retry_state.outcome.exception()
+    logger.warning(
+        f"Attempt {retry_state.attempt_number} failed with {type(exc).__name__}: {exc}; "
+        f"retrying in {retry_state.next_action.sleep:.2f}s"
+    )
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delay in seconds or HTTP date) into seconds to wait."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return (retry_at - datetime.now(timezone.utc)).total_seconds()
+
+
+async def with_retry(
+    fn: Callable[[], Awaitable[T]],
+    *,
+    retry_if: Callable[[BaseException], bool],
+    retry_after: Optional[Callable[[BaseException], Optional[float]]] = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    deadline: float = DEFAULT_RETRY_DEADLINE,
+) -> T:
+    """
+    Await `fn()` and retry it with exponential backoff and full jitter while `retry_if(exc)` holds.
+
+    Args:
+        fn: Zero-argument callable returning a fresh awaitable per attempt.
+        retry_if: Decides whether a raised exception is transient.
+        retry_after: Optional server-requested delay for an exception (e.g. from Retry-After).
+        max_attempts: Total number of attempts, including the first.
+        deadline: Seconds after the first attempt started beyond which no further attempt is made.
+
+    Returns:
+        The result of the first successful attempt; the last exception is re-raised once attempts run out.
+    """
+    wait = wait_random_exponential(multiplier=BACKOFF_MULTIPLIER, max=MAX_RETRY_WAIT)
+    if retry_after is not None:
+        wait = _wait_retry_after(wait, retry_after)
+
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(max_attempts) | stop_after_delay(deadline),
+        wait=wait,
+        retry=retry_if_exception(retry_if),
+        before_sleep=_log_retry,
+        reraise=True,
+    ):
+        with attempt:
+            return await fn()
+    raise AssertionError("unreachable: AsyncRetrying re-raises the last failure")